@@ -1,21 +1,36 @@
 use crate::{
     config::Config,
-    scanner::{scan_projects, BackupApplication, BackupType, VolumeType},
+    scanner::{scan_projects, BackupApplication, BackupType, Compression, Volume, VolumeType},
+    state::{fingerprint, BackupState, StateEntry},
+    utils::{
+        close_ssh_master, format_size, has_program, rsync_ssh_arg, run_parallel, ssh_command,
+        ssh_destination, ssh_stream_command, Semaphore,
+    },
 };
 use anyhow::Result;
-use chrono::Local;
+use chrono::{DateTime, Local};
 use std::{
-    fs::{self, File},
+    fs,
+    io::{self, Read, Write},
     path::PathBuf,
-    process::Command,
+    process::{Child, Command, Stdio},
+    sync::OnceLock,
 };
 
 #[derive(Debug)]
 pub struct BackupThingSummary {
     pub name: String,
     pub status: String,
+    /// What this backup sent to the target: the archive for a streamed
+    /// backup, nothing for a reused one, rsync's transfer for a snapshot.
     pub size: String,
+    /// `size` as an exact byte count, for the totals of the summary email.
+    pub size_bytes: u64,
     pub duration: String,
+    /// When the work started and ended, for the wall-clock time of an app
+    /// whose jobs ran in parallel.
+    pub started: DateTime<Local>,
+    pub finished: DateTime<Local>,
     pub volume_type: String,
 }
 
@@ -24,242 +39,406 @@ pub struct AppSummary {
     pub volume_statuses: Vec<BackupThingSummary>,
 }
 
+/// Log lines of one backup job. They are written as a single record when
+/// the job ends, so the lines of parallel jobs do not interleave and each
+/// job takes the logger's lock once.
+struct JobLog {
+    level: log::Level,
+    lines: Vec<String>,
+}
+
+impl JobLog {
+    fn new() -> Self {
+        JobLog {
+            level: log::Level::Info,
+            lines: Vec::new(),
+        }
+    }
+
+    /// Adds a line; the record is logged at the most severe level pushed.
+    fn push(&mut self, level: log::Level, line: String) {
+        self.level = self.level.min(level);
+        self.lines.push(line);
+    }
+
+    fn flush(self) {
+        if !self.lines.is_empty() {
+            log::log!(self.level, "{}", self.lines.join("\n  "));
+        }
+    }
+}
+
+/// One unit of work for the backup pool: the repo of `app` when `volume` is
+/// `None`, otherwise one of its volumes.
+struct BackupJob<'a> {
+    app: &'a BackupApplication,
+    remote_base: &'a str,
+    volume: Option<&'a Volume>,
+}
+
 pub fn run_backup(config: &Config, mode: bool) -> Result<Vec<AppSummary>> {
-    let apps = scan_projects(config)?;
+    let mut apps = scan_projects(config)?;
     println!("{:?}", apps);
     let mut summaries: Vec<AppSummary> = Vec::new();
 
     backup_config(config)?;
 
-    for mut app in apps {
-        let backup_type = if mode {
-            BackupType::Scheduled
-        } else {
-            BackupType::Manual
-        };
-        app.backup_type = Some(backup_type.clone());
-        log::info!("Backup mode: {}", backup_type);
+    let backup_type = if mode {
+        BackupType::Scheduled
+    } else {
+        BackupType::Manual
+    };
+    log::info!("Backup mode: {}", backup_type);
+
+    let mut remote_bases = Vec::new();
+    let mut remote_dirs = Vec::new();
+    let compression = host_compression();
+    for app in &mut apps {
+        app.backup_type = Some(backup_type);
+        app.compression = compression;
+        app.rsync_bind_mounts = config.rsync_bind_mounts;
         log::info!("🗂  Backing up: {}", app.name);
-        let mut volume_statuses = Vec::new();
         let timestamp_str = app.timestamp.format("%Y_%m_%d_%H%M%S").to_string();
         let remote_base = format!(
             "{}/{}/{}",
             config.remote_backup_path, app.name, timestamp_str
         );
-        run_remote_cmd(
-            config,
-            &format!("mkdir -p {}/REPO {}/VOLUMES", remote_base, remote_base),
-        )?;
-
-        let mut created_files: Vec<PathBuf> = Vec::new();
-        let start_repo_time = Local::now();
-        let repo_tar = create_tar(&app.application_path, "repo.tar.gz")?;
-        created_files.push(repo_tar.clone());
-
-        if let Err(e) = scp_upload(
-            config,
-            &repo_tar,
-            &format!("{}/REPO/repo.tar.gz", remote_base),
-        ) {
-            log::error!("❌ Failed to upload repo tarball: {e}");
-        } else {
-            let repo_size = get_file_size(&repo_tar)?;
-            let duration = format!(
-                "{:.2} seconds",
-                (Local::now().timestamp_millis() - start_repo_time.timestamp_millis()) as f64
-                    / 1000.0
-            );
-            let repo_size_str = format!("{}", repo_size);
-            let repo_summary = BackupThingSummary {
-                name: "REPO".to_string(),
-                status: "✅".to_string(),
-                size: repo_size_str,
-                duration,
-                volume_type: "Repo".to_string(),
-            };
-            volume_statuses.push(repo_summary);
-        }
+        remote_dirs.push(format!("{}/REPO {}/VOLUMES", remote_base, remote_base));
+        remote_bases.push(remote_base);
+    }
+    // A single round trip creates the folders of every app
+    if !remote_dirs.is_empty() {
+        run_remote_cmd(config, &format!("mkdir -p {}", remote_dirs.join(" ")))?;
+    }
 
-        for vol in &app.volumes {
-            let start_volume_time = Local::now();
-            let (_success, summary) = match vol.volume_type {
-                VolumeType::Bind => {
-                    // 🧱 Handle bind mount
-                    let sanitized = vol
-                        .path
-                        .to_string_lossy()
-                        .trim_start_matches("./")
-                        .replace('/', "_");
-                    let tar_name = format!("{sanitized}.tar.gz");
-                    match create_tar(&vol.path, &tar_name) {
-                        Err(e) => {
-                            log::error!(
-                                "❌ Failed to create tarball for bind mount `{}`: {}",
-                                vol.name,
-                                e
-                            );
-                            (
-                                false,
-                                BackupThingSummary {
-                                    name: vol.name.clone(),
-                                    status: "❌ Failed to tar bind mount".into(),
-                                    size: "-".into(),
-                                    duration: "-".into(),
-                                    volume_type: "Bind".to_string(),
-                                },
-                            )
-                        }
-                        Ok(tar) => {
-                            created_files.push(tar.clone());
-                            let upload_res = scp_upload(
-                                config,
-                                &tar,
-                                &format!(
-                                    "{}/VOLUMES/{}",
-                                    remote_base,
-                                    tar.file_name().unwrap().to_string_lossy()
-                                ),
-                            );
-                            let duration = format!(
-                                "{:.2} seconds",
-                                (Local::now().timestamp_millis()
-                                    - start_volume_time.timestamp_millis())
-                                    as f64
-                                    / 1000.0
-                            );
-                            if let Err(e) = upload_res {
-                                log::error!(
-                                    "❌ Upload failed for bind mount `{}`: {}",
-                                    vol.name,
-                                    e
-                                );
-                                (
-                                    false,
-                                    BackupThingSummary {
-                                        name: vol.name.clone(),
-                                        status: "❌ Upload failed".into(),
-                                        size: "-".into(),
-                                        duration,
-                                        volume_type: "Bind".to_string(),
-                                    },
-                                )
-                            } else {
-                                let size = get_file_size(&tar)?;
-                                log::info!("✅ Bind mount `{}` backed up", vol.name);
-                                (
-                                    true,
-                                    BackupThingSummary {
-                                        name: vol.name.clone(),
-                                        status: "✅".into(),
-                                        size,
-                                        duration,
-                                        volume_type: "Bind".to_string(),
-                                    },
-                                )
-                            }
-                        }
-                    }
-                }
-
-                VolumeType::Mount => {
-                    // 📦 Handle Docker volume
-                    let docker_vol = format!("{}_{}", app.name, vol.name);
-                    let sanitized = vol
-                        .path
-                        .to_string_lossy()
-                        .trim_start_matches("./")
-                        .replace('/', "_");
-                    let tar_name = format!("{sanitized}.tar.gz");
-                    match create_volume_tar(&docker_vol, &tar_name) {
-                        Err(e) => {
-                            log::error!(
-                                "❌ Failed to create Docker volume tarball `{}`: {}",
-                                vol.name,
-                                e
-                            );
-                            (
-                                false,
-                                BackupThingSummary {
-                                    name: vol.name.clone(),
-                                    status: "❌ Failed to tar Docker volume".into(),
-                                    size: "-".into(),
-                                    duration: "-".into(),
-                                    volume_type: "Docker".to_string(),
-                                },
-                            )
-                        }
-                        Ok(tar) => {
-                            created_files.push(tar.clone());
-                            let upload_res = scp_upload(
-                                config,
-                                &tar,
-                                &format!(
-                                    "{}/VOLUMES/{}",
-                                    remote_base,
-                                    tar.file_name().unwrap().to_string_lossy()
-                                ),
-                            );
-                            let duration = format!(
-                                "{:.2} seconds",
-                                (Local::now().timestamp_millis()
-                                    - start_volume_time.timestamp_millis())
-                                    as f64
-                                    / 1000.0
-                            );
-                            if let Err(e) = upload_res {
-                                log::error!(
-                                    "❌ Upload failed for Docker volume `{}`: {}",
-                                    vol.name,
-                                    e
-                                );
-                                (
-                                    false,
-                                    BackupThingSummary {
-                                        name: vol.name.clone(),
-                                        status: "❌ Upload failed".into(),
-                                        size: "-".into(),
-                                        duration,
-                                        volume_type: "Docker".to_string(),
-                                    },
-                                )
-                            } else {
-                                let size = get_file_size(&tar)?;
-                                log::info!("✅ Docker volume `{}` backed up", vol.name);
-                                (
-                                    true,
-                                    BackupThingSummary {
-                                        name: vol.name.clone(),
-                                        status: "✅".into(),
-                                        size,
-                                        duration,
-                                        volume_type: "Docker".to_string(),
-                                    },
-                                )
-                            }
-                        }
-                    }
-                }
-            };
-
-            volume_statuses.push(summary);
+    // Repos and volumes of all apps share one pool, so tarring one volume
+    // overlaps with uploading another. Every job runs its own ssh connection.
+    let jobs: Vec<BackupJob> = apps
+        .iter()
+        .zip(&remote_bases)
+        .flat_map(|(app, remote_base)| {
+            std::iter::once(None)
+                .chain(app.volumes.iter().map(Some))
+                .map(move |volume| BackupJob {
+                    app,
+                    remote_base,
+                    volume,
+                })
+        })
+        .collect();
+    let mut state = BackupState::load();
+    // Every stream runs a multi-threaded compressor and saturates the link,
+    // so fewer of them run at once than there are workers
+    let streams = Semaphore::new(config.max_concurrent_streams);
+    let results = run_parallel(&jobs, config.backup_workers, |job| {
+        let mut job_log = JobLog::new();
+        let result = backup_one(config, &state, &streams, job, &mut job_log);
+        job_log.flush();
+        result
+    });
+    let mut statuses = Vec::new();
+    for (summary, update) in results {
+        if let Some((key, entry)) = update {
+            state.entries.insert(key, entry);
         }
+        statuses.push(summary);
+    }
+    if let Err(e) = state.save() {
+        log::warn!("⚠️  Failed to save backup state: {e}");
+    }
+    let mut statuses = statuses.into_iter();
+
+    for (app, remote_base) in apps.iter().zip(&remote_bases) {
         summaries.push(AppSummary {
             name: app.name.clone(),
-            volume_statuses,
+            volume_statuses: statuses.by_ref().take(app.volumes.len() + 1).collect(),
         });
 
         let remote_meta_path = format!("{}/meta.json", remote_base);
-        save_metadata(config, &app, remote_meta_path)?;
+        save_metadata(config, app, remote_meta_path)?;
+    }
+    close_ssh_master(config);
+    Ok(summaries)
+}
+
+fn backup_one(
+    config: &Config,
+    state: &BackupState,
+    streams: &Semaphore,
+    job: &BackupJob,
+    job_log: &mut JobLog,
+) -> (BackupThingSummary, Option<(String, StateEntry)>) {
+    if let Some(vol) = job.volume {
+        if job.app.rsync_bind_mounts && matches!(vol.volume_type, VolumeType::Bind) {
+            return rsync_bind_mount(config, state, streams, job, vol, job_log);
+        }
+    }
 
-        for f in created_files {
-            if let Err(e) = fs::remove_file(&f) {
-                log::warn!("⚠️  Failed to delete temp file {:?}: {e}", f);
-            } else {
-                log::info!("🧹 Deleted temp file {:?}", f);
+    let mut start_time = Local::now();
+    let (source, remote_path, name, label, volume_type, local_path) = match job.volume {
+        None => (
+            bind_tar_command(&job.app.application_path),
+            format!(
+                "{}/REPO/repo.{}",
+                job.remote_base,
+                job.app.compression.extension()
+            ),
+            "REPO".to_string(),
+            "Repo",
+            "Repo",
+            Some(&job.app.application_path),
+        ),
+        Some(vol) => {
+            let remote_path = format!(
+                "{}/VOLUMES/{}",
+                job.remote_base,
+                vol.archive_name(job.app.compression)
+            );
+            match vol.volume_type {
+                // 🧱 Handle bind mount
+                VolumeType::Bind => (
+                    bind_tar_command(&vol.path),
+                    remote_path,
+                    vol.name.clone(),
+                    "Bind mount",
+                    "Bind",
+                    Some(&vol.path),
+                ),
+                // 📦 Handle Docker volume, its data is only reachable through Docker
+                VolumeType::Mount => (
+                    volume_tar_command(&format!("{}_{}", job.app.name, vol.name)),
+                    remote_path,
+                    vol.name.clone(),
+                    "Docker volume",
+                    "Docker",
+                    None,
+                ),
+            }
+        }
+    };
+    let subject = if job.volume.is_some() {
+        &name
+    } else {
+        &job.app.name
+    };
+    let current = local_path.and_then(|path| match fingerprint(path) {
+        Ok(hash) => Some((path.to_string_lossy().to_string(), hash)),
+        Err(e) => {
+            job_log.push(
+                log::Level::Warn,
+                format!("⚠️  Could not fingerprint {:?}: {}", path, e),
+            );
+            None
+        }
+    });
+
+    // Unchanged since the last run: hard link the previous archive on the
+    // target instead of tarring and uploading the same data again
+    if let Some((key, hash)) = &current {
+        let extension = job.app.compression.extension();
+        if let Some(previous) = state.unchanged(key, *hash, extension) {
+            let linked = run_remote_cmd(
+                config,
+                &format!("ln '{}' '{}'", previous.remote_path, remote_path),
+            );
+            if linked.is_ok() {
+                job_log.push(
+                    log::Level::Info,
+                    format!(
+                        "⏭  {} `{}` unchanged, reused previous archive",
+                        label, subject
+                    ),
+                );
+                let entry = StateEntry {
+                    fingerprint: *hash,
+                    remote_path,
+                    size: previous.size,
+                    snapshot_dir: false,
+                };
+                let finished = Local::now();
+                return (
+                    BackupThingSummary {
+                        name,
+                        status: "✅ Unchanged".into(),
+                        // Only a hard link was created, no data was sent
+                        size: format_size(0),
+                        size_bytes: 0,
+                        duration: elapsed(start_time, finished),
+                        started: start_time,
+                        finished,
+                        volume_type: volume_type.to_string(),
+                    },
+                    Some((key.clone(), entry)),
+                );
             }
         }
     }
-    Ok(summaries)
+
+    let upload_res = {
+        let _stream = streams.acquire();
+        // Time spent waiting for a free stream is not part of this backup
+        start_time = Local::now();
+        stream_to_remote(config, source, job.app.compression, &remote_path)
+    };
+    let finished = Local::now();
+    let duration = elapsed(start_time, finished);
+    match upload_res {
+        Err(e) => {
+            job_log.push(
+                log::Level::Error,
+                format!("❌ Backup failed for {} `{}`: {}", label, subject, e),
+            );
+            (
+                BackupThingSummary {
+                    name,
+                    status: "❌ Backup failed".into(),
+                    size: "-".into(),
+                    size_bytes: 0,
+                    duration,
+                    started: start_time,
+                    finished,
+                    volume_type: volume_type.to_string(),
+                },
+                None,
+            )
+        }
+        Ok(size) => {
+            job_log.push(
+                log::Level::Info,
+                format!("✅ {} `{}` backed up", label, subject),
+            );
+            let update = current.map(|(key, hash)| {
+                let entry = StateEntry {
+                    fingerprint: hash,
+                    remote_path,
+                    size,
+                    snapshot_dir: false,
+                };
+                (key, entry)
+            });
+            (
+                BackupThingSummary {
+                    name,
+                    status: "✅".into(),
+                    size: format_size(size),
+                    size_bytes: size,
+                    duration,
+                    started: start_time,
+                    finished,
+                    volume_type: volume_type.to_string(),
+                },
+                update,
+            )
+        }
+    }
+}
+
+fn elapsed(start_time: DateTime<Local>, finished: DateTime<Local>) -> String {
+    format!(
+        "{:.2} seconds",
+        (finished - start_time).num_milliseconds() as f64 / 1000.0
+    )
+}
+
+/// Syncs a bind mount into a snapshot folder with rsync. Files unchanged since
+/// the previous snapshot are hard linked against it (`--link-dest`), so only
+/// changed files cross the network or take new space on the target.
+fn rsync_bind_mount(
+    config: &Config,
+    state: &BackupState,
+    streams: &Semaphore,
+    job: &BackupJob,
+    vol: &Volume,
+    job_log: &mut JobLog,
+) -> (BackupThingSummary, Option<(String, StateEntry)>) {
+    let key = vol.path.to_string_lossy().to_string();
+    let remote_dir = format!("{}/VOLUMES/{}", job.remote_base, vol.snapshot_dir_name());
+
+    let mut rsync = Command::new("rsync");
+    rsync.args([
+        "-aH",
+        "--numeric-ids",
+        "--delete",
+        "--stats",
+        "-e",
+        &rsync_ssh_arg(config),
+    ]);
+    if let Some(previous) = state.entries.get(&key).filter(|entry| entry.snapshot_dir) {
+        rsync.arg(format!("--link-dest={}", previous.remote_path));
+    }
+    rsync.arg(format!("{}/", vol.path.display())).arg(format!(
+        "{}:{}/",
+        ssh_destination(config),
+        remote_dir
+    ));
+    let (output, start_time) = {
+        let _stream = streams.acquire();
+        let start_time = Local::now();
+        (rsync.output(), start_time)
+    };
+
+    let finished = Local::now();
+    let duration = elapsed(start_time, finished);
+    let error = match &output {
+        Ok(output) if output.status.success() => None,
+        Ok(output) => Some(String::from_utf8_lossy(&output.stderr).trim().to_string()),
+        Err(e) => Some(e.to_string()),
+    };
+    if let Some(e) = error {
+        job_log.push(
+            log::Level::Error,
+            format!("❌ Backup failed for Bind mount `{}`: {}", vol.name, e),
+        );
+        return (
+            BackupThingSummary {
+                name: vol.name.clone(),
+                status: "❌ Backup failed".into(),
+                size: "-".into(),
+                size_bytes: 0,
+                duration,
+                started: start_time,
+                finished,
+                volume_type: "Bind".to_string(),
+            },
+            None,
+        );
+    }
+
+    let stats = String::from_utf8_lossy(&output.unwrap().stdout).to_string();
+    let sent: Option<u64> = stats
+        .lines()
+        .find_map(|line| line.strip_prefix("Total bytes sent:"))
+        .and_then(|value| value.trim().replace(',', "").parse().ok());
+    job_log.push(
+        log::Level::Info,
+        format!("✅ Bind mount `{}` synced", vol.name),
+    );
+    if sent.is_none() {
+        job_log.push(
+            log::Level::Warn,
+            format!("⚠️  No transfer size in the rsync stats for `{}`", vol.name),
+        );
+    }
+    let entry = StateEntry {
+        // Snapshot folders are always synced, never reused by fingerprint
+        fingerprint: 0,
+        remote_path: remote_dir,
+        size: sent.unwrap_or(0),
+        snapshot_dir: true,
+    };
+    (
+        BackupThingSummary {
+            name: vol.name.clone(),
+            status: "✅".into(),
+            size: sent.map_or("-".into(), format_size),
+            size_bytes: sent.unwrap_or(0),
+            duration,
+            started: start_time,
+            finished,
+            volume_type: "Bind".to_string(),
+        },
+        Some((key, entry)),
+    )
 }
 
 pub fn dry_run(config: &Config) -> Result<()> {
@@ -288,86 +467,199 @@ pub fn dry_run(config: &Config) -> Result<()> {
     Ok(())
 }
 
-fn create_tar(src: &PathBuf, output: &str) -> Result<PathBuf> {
-    let output_path = PathBuf::from("/tmp").join(output);
-    let status = Command::new("tar")
-        .args([
-            "-czf",
-            output_path.to_str().unwrap(),
-            "-C",
-            src.to_str().unwrap(),
-            ".",
-        ])
-        .status()?;
-    if !status.success() {
-        anyhow::bail!("Failed to create tarball: {:?}", output_path);
+/// Size of the buffer used to pump archive data from the producer into ssh.
+const STREAM_CHUNK_SIZE: usize = 1 << 20;
+
+fn bind_tar_command(src: &PathBuf) -> Command {
+    let mut cmd = Command::new("tar");
+    cmd.args(["-cf", "-", "-C", src.to_str().unwrap(), "."]);
+    cmd
+}
+
+fn volume_tar_command(volume: &str) -> Command {
+    let mut cmd = Command::new("docker");
+    cmd.args([
+        "run",
+        "--rm",
+        "-v",
+        &format!("{}:/data", volume),
+        "alpine",
+        "tar",
+        "-cf",
+        "-",
+        "-C",
+        "/data",
+        ".",
+    ]);
+    cmd
+}
+
+/// zstd at level 3 compresses several times faster than gzip at a similar
+/// ratio, so it is used whenever it is installed.
+fn host_compression() -> Compression {
+    static COMPRESSION: OnceLock<Compression> = OnceLock::new();
+    *COMPRESSION.get_or_init(|| {
+        if has_program("zstd") {
+            Compression::Zstd
+        } else {
+            Compression::Gzip
+        }
+    })
+}
+
+/// Compresses stdin to stdout on all cores: `zstd -T0`, or `pigz` for gzip
+/// when it is installed, falling back to single-threaded `gzip`.
+fn compress_command(compression: Compression) -> Command {
+    static GZIP: OnceLock<&str> = OnceLock::new();
+    match compression {
+        Compression::Zstd => {
+            let mut cmd = Command::new("zstd");
+            cmd.args(["-T0", "-3", "-q", "-c"]);
+            cmd
+        }
+        Compression::Gzip => {
+            let program = *GZIP.get_or_init(|| if has_program("pigz") { "pigz" } else { "gzip" });
+            let mut cmd = Command::new(program);
+            cmd.arg("-c");
+            cmd
+        }
     }
-    Ok(output_path)
 }
 
-fn create_volume_tar(volume: &str, tar_name: &str) -> Result<PathBuf> {
-    let output_path = PathBuf::from("/tmp").join(tar_name);
-
-    let status = Command::new("docker")
-        .args([
-            "run",
-            "--rm",
-            "-v",
-            &format!("{}:/data", volume),
-            "-v",
-            "/tmp:/backup",
-            "alpine",
-            "sh",
-            "-c",
-            &format!("tar -czf /backup/{} -C /data .", tar_name),
-        ])
-        .status()?;
+/// Runs the uncompressed tar stream of `source` through the compressor and
+/// pipes the result straight into `cat` on the backup target, so archives are
+/// never staged in `/tmp`. Returns the number of bytes sent.
+///
+/// The archive is written to `<remote_path>.part` and only renamed to its
+/// final name once every process succeeded, so a failed tar never leaves a
+/// truncated archive where restore would pick it up.
+fn stream_to_remote(
+    cfg: &Config,
+    source: Command,
+    compression: Compression,
+    remote_path: &str,
+) -> Result<u64> {
+    let part_path = format!("{}.part", remote_path);
+    let result =
+        stream_pipeline(cfg, source, compression, remote_path, &part_path).and_then(|bytes| {
+            run_remote_cmd(cfg, &format!("mv '{}' '{}'", part_path, remote_path))?;
+            Ok(bytes)
+        });
+    if result.is_err() {
+        let _ = run_remote_cmd(cfg, &format!("rm -f '{}'", part_path));
+    }
+    result
+}
 
-    if !status.success() {
-        anyhow::bail!("Failed to create tarball for volume: {}", volume);
+fn stream_pipeline(
+    cfg: &Config,
+    source: Command,
+    compression: Compression,
+    remote_path: &str,
+    part_path: &str,
+) -> Result<u64> {
+    let mut producers = spawn_pipeline(vec![source, compress_command(compression)])?;
+    let consumer = ssh_stream_command(cfg, &format!("cat > '{}'", part_path))
+        .stdin(Stdio::piped())
+        .spawn();
+    let mut consumer = match consumer {
+        Ok(consumer) => consumer,
+        Err(e) => {
+            abort(&mut producers);
+            return Err(e.into());
+        }
+    };
+
+    let copied = pump(
+        producers.last_mut().unwrap().stdout.take().unwrap(),
+        consumer.stdin.take().unwrap(),
+    );
+    if copied.is_err() {
+        // ssh went away: make sure no producer is left blocked on a full pipe
+        for producer in &mut producers {
+            let _ = producer.kill();
+        }
+    }
+    let mut producers_ok = true;
+    for producer in &mut producers {
+        producers_ok &= producer.wait()?.success();
+    }
+    let consumer_status = consumer.wait()?;
+
+    let bytes = copied?;
+    if !producers_ok {
+        anyhow::bail!("Failed to create tarball for: {}", remote_path);
+    }
+    if !consumer_status.success() {
+        anyhow::bail!("Upload failed: {}", remote_path);
+    }
+    Ok(bytes)
+}
+
+/// Spawns `stages` with the stdout of each one feeding the stdin of the next.
+/// The stdout of the last stage is left piped for the caller.
+fn spawn_pipeline(stages: Vec<Command>) -> io::Result<Vec<Child>> {
+    let mut children: Vec<Child> = Vec::new();
+    for mut stage in stages {
+        if let Some(previous) = children.last_mut() {
+            stage.stdin(previous.stdout.take().unwrap());
+        }
+        match stage.stdout(Stdio::piped()).spawn() {
+            Ok(child) => children.push(child),
+            Err(e) => {
+                abort(&mut children);
+                return Err(e);
+            }
+        }
     }
+    Ok(children)
+}
 
-    Ok(output_path)
+fn abort(children: &mut [Child]) {
+    for child in children {
+        let _ = child.kill();
+        let _ = child.wait();
+    }
 }
 
-fn get_file_size(path: &PathBuf) -> Result<String> {
-    let output = Command::new("du")
-        .args(["-sh", path.to_str().unwrap()])
-        .output()?;
-    if !output.status.success() {
-        anyhow::bail!("Failed to get file size for: {:?}", path);
+/// Copies `reader` into `writer` in `STREAM_CHUNK_SIZE` chunks and closes the writer.
+fn pump(mut reader: impl Read, mut writer: impl Write) -> io::Result<u64> {
+    let mut buf = vec![0u8; STREAM_CHUNK_SIZE];
+    let mut total = 0u64;
+    loop {
+        let n = match reader.read(&mut buf) {
+            Ok(0) => break,
+            Ok(n) => n,
+            Err(e) if e.kind() == io::ErrorKind::Interrupted => continue,
+            Err(e) => return Err(e),
+        };
+        writer.write_all(&buf[..n])?;
+        total += n as u64;
     }
-    let size_str = String::from_utf8_lossy(&output.stdout);
-    let size = size_str.split_whitespace().next().unwrap_or("0");
-    Ok(size.to_string())
+    writer.flush()?;
+    Ok(total)
 }
 
 fn run_remote_cmd(cfg: &Config, cmd: &str) -> Result<()> {
-    let full_cmd = format!(
-        "ssh -i {} -p {} {}@{} '{}'",
-        cfg.ssh_key, cfg.ssh_port, cfg.ssh_user, cfg.ssh_host, cmd
-    );
-    let status = Command::new("sh").arg("-c").arg(full_cmd).status()?;
+    let status = ssh_command(cfg, cmd).status()?;
     if !status.success() {
         anyhow::bail!("SSH command failed: {}", cmd);
     }
     Ok(())
 }
 
-fn scp_upload(cfg: &Config, local: &PathBuf, remote_path: &str) -> Result<()> {
-    let remote = format!("{}@{}:{}", cfg.ssh_user, cfg.ssh_host, remote_path);
-    let status = Command::new("scp")
-        .args([
-            "-i",
-            &cfg.ssh_key,
-            "-P",
-            &cfg.ssh_port.to_string(),
-            local.to_str().unwrap(),
-            &remote,
-        ])
-        .status()?;
+/// Writes `data` to `remote_path` through `cat` on the backup target. Small
+/// files go over the shared connection, without scp's per-file SFTP
+/// handshake and request/acknowledge round trips.
+fn upload_bytes(cfg: &Config, data: &[u8], remote_path: &str) -> Result<()> {
+    let mut upload = ssh_command(cfg, &format!("cat > '{}'", remote_path))
+        .stdin(Stdio::piped())
+        .spawn()?;
+    let written = upload.stdin.take().unwrap().write_all(data);
+    let status = upload.wait()?;
+    written?;
     if !status.success() {
-        anyhow::bail!("SCP upload failed: {:?}", local);
+        anyhow::bail!("Upload failed: {}", remote_path);
     }
     Ok(())
 }
@@ -379,18 +671,16 @@ fn backup_config(config: &Config) -> Result<()> {
         .join(".dockup")
         .join("config.json");
 
-    log::info!(
-        "⚙️  Backing up config to: {}/config.json",
-        config.remote_backup_path
-    );
-    if let Err(e) = scp_upload(
-        config,
-        &config_path,
-        &format!("{}", config.remote_backup_path),
-    ) {
+    let remote_path = format!("{}/config.json", config.remote_backup_path);
+    log::info!("⚙️  Backing up config to: {}", remote_path);
+    let uploaded = fs::read(&config_path)
+        .map_err(anyhow::Error::from)
+        .and_then(|data| upload_bytes(config, &data, &remote_path));
+    if let Err(e) = uploaded {
         log::error!("❌ Failed to upload config file: {e}");
+    } else {
+        log::info!("✅ Config file uploaded successfully");
     }
-    log::info!("✅ Config file uploaded successfully");
 
     Ok(())
 }
@@ -400,16 +690,9 @@ pub fn save_metadata(
     app: &BackupApplication,
     remote_path: String,
 ) -> std::io::Result<()> {
-    let local_meta_path = PathBuf::from("/tmp").join(format!("{}_meta.json", app.name));
-    let file = File::create(&local_meta_path)?;
-    serde_json::to_writer_pretty(&file, app)?;
-    println!(
-        "✅ Metadata written locally to {}",
-        local_meta_path.display()
-    );
+    let meta = serde_json::to_vec_pretty(app)?;
 
-    // Upload it
-    if let Err(e) = scp_upload(config, &local_meta_path, &remote_path) {
+    if let Err(e) = upload_bytes(config, &meta, &remote_path) {
         eprintln!("❌ Failed to upload meta.json: {}", e);
     } else {
         println!(
@@ -418,10 +701,5 @@ pub fn save_metadata(
         );
     }
 
-    // Clean up local temp file
-    if let Err(e) = fs::remove_file(&local_meta_path) {
-        eprintln!("⚠️  Failed to delete local meta.json: {}", e);
-    }
-
     Ok(())
 }
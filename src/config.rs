@@ -1,4 +1,4 @@
-use crate::email;
+use crate::{email, utils};
 use anyhow::{Context, Result};
 use serde::{Deserialize, Serialize};
 use std::{
@@ -7,6 +7,11 @@ use std::{
     path::PathBuf,
 };
 
+/// Number of repos/volumes backed up concurrently unless configured otherwise.
+const DEFAULT_BACKUP_WORKERS: usize = 4;
+/// Number of archive streams (tar, compressor and upload) running at once.
+const DEFAULT_MAX_CONCURRENT_STREAMS: usize = 2;
+
 #[derive(Debug, Serialize, Deserialize, Default, Clone)]
 #[serde(default)]
 pub struct RawConfig {
@@ -22,6 +27,9 @@ pub struct RawConfig {
     pub email_password: Option<String>,
     pub receiver_mail: Option<String>,
     pub interval: Option<RawIntervalConfig>,
+    pub backup_workers: Option<usize>,
+    pub max_concurrent_streams: Option<usize>,
+    pub rsync_bind_mounts: Option<bool>,
 }
 
 #[derive(Debug, Serialize, Deserialize, Clone)]
@@ -47,6 +55,9 @@ pub struct Config {
     pub email_password: String,
     pub receiver_mail: String,
     pub interval: IntervalConfig,
+    pub backup_workers: usize,
+    pub max_concurrent_streams: usize,
+    pub rsync_bind_mounts: bool,
 }
 
 #[derive(Debug, Serialize, Deserialize, Clone, Copy)]
@@ -77,28 +88,27 @@ impl Config {
     pub async fn load_or_create() -> Result<Self> {
         let path = Self::config_path();
 
-        let raw: RawConfig = if path.exists() {
-            let data = fs::read_to_string(&path)?;
-            serde_json::from_str(&data)?
+        let (raw, stored): (RawConfig, _) = if path.exists() {
+            let stored: serde_json::Value = serde_json::from_str(&fs::read_to_string(&path)?)?;
+            (serde_json::from_value(stored.clone())?, Some(stored))
         } else {
             log::info!("No config found. Creating one.");
-            RawConfig::interactive_create().await?
+            (RawConfig::interactive_create().await?, None)
         };
 
         let finalized = raw.finalize()?;
-        finalized.save()?;
+        // Only write the file back when it was created or had to be completed
+        if stored != Some(serde_json::to_value(&finalized)?) {
+            finalized.save()?;
+        }
         Ok(finalized)
     }
 
     pub async fn test_ssh(&self) -> Result<()> {
-        let output = std::process::Command::new("ssh")
-            .arg("-i")
-            .arg(&self.ssh_key)
-            .arg("-p")
-            .arg(self.ssh_port.to_string())
-            .arg(format!("{}@{}", self.ssh_user, self.ssh_host))
-            .arg("echo 'SSH connection successful'")
-            .output()?;
+        // A connection of its own: a running master was authenticated with
+        // whatever key was configured before and would hide a broken one
+        let output =
+            utils::ssh_stream_command(self, "echo 'SSH connection successful'").output()?;
 
         if output.status.success() {
             log::info!("✅ SSH connection successful");
@@ -130,6 +140,19 @@ impl Config {
             "email_user" => self.email_user = value.to_string(),
             "email_password" => self.email_password = value.to_string(),
             "receiver_mail" => self.receiver_mail = value.to_string(),
+            "backup_workers" => {
+                self.backup_workers = value.parse().context("Invalid value for backup_workers")?
+            }
+            "max_concurrent_streams" => {
+                self.max_concurrent_streams = value
+                    .parse()
+                    .context("Invalid value for max_concurrent_streams")?
+            }
+            "rsync_bind_mounts" => {
+                self.rsync_bind_mounts = value
+                    .parse()
+                    .context("Invalid value for rsync_bind_mounts")?
+            }
             "interval.hour" => {
                 self.interval.hour = value.parse().context("Invalid value for interval.hour")?
             }
@@ -295,6 +318,9 @@ impl RawConfig {
             email_password: Some(ask("Email password")?),
             receiver_mail: Some(ask("Receiver email")?),
             interval: Some(interval),
+            backup_workers: None,
+            max_concurrent_streams: None,
+            rsync_bind_mounts: None,
         };
 
         let test_prompt =
@@ -382,6 +408,11 @@ impl RawConfig {
             email_password: get!(email_password, String),
             receiver_mail: get!(receiver_mail, String),
             interval,
+            backup_workers: self.backup_workers.unwrap_or(DEFAULT_BACKUP_WORKERS),
+            max_concurrent_streams: self
+                .max_concurrent_streams
+                .unwrap_or(DEFAULT_MAX_CONCURRENT_STREAMS),
+            rsync_bind_mounts: self.rsync_bind_mounts.unwrap_or(false),
         })
     }
 }
@@ -6,6 +6,18 @@ use lettre::{
     AsyncSmtpTransport, AsyncTransport, Tokio1Executor,
 };
 
+/// Built from `cfg` for every mail: a process sends at most a couple of
+/// them, and `config set` may have changed the settings in between.
+fn mailer(cfg: &Config) -> Result<AsyncSmtpTransport<Tokio1Executor>> {
+    let creds = Credentials::new(cfg.email_user.clone(), cfg.email_password.clone());
+    Ok(
+        AsyncSmtpTransport::<Tokio1Executor>::relay(&cfg.email_host)?
+            .port(cfg.email_port)
+            .credentials(creds)
+            .build(),
+    )
+}
+
 /// Send summary email after backup job
 use lettre::message::{header::ContentType, SinglePart};
 
@@ -20,14 +32,7 @@ pub async fn send_summary_email(cfg: &Config, subject: &str, html_body: &str) ->
                 .body(html_body.to_string()),
         )?;
 
-    let creds = Credentials::new(cfg.email_user.clone(), cfg.email_password.clone());
-
-    let mailer = AsyncSmtpTransport::<Tokio1Executor>::relay(&cfg.email_host)?
-        .port(cfg.email_port)
-        .credentials(creds)
-        .build();
-
-    match mailer.send(email).await {
+    match mailer(cfg)?.send(email).await {
         Ok(_) => log::info!("✅ Email sent to {}", cfg.receiver_mail),
         Err(e) => log::error!("❌ Failed to send email: {e}"),
     }
@@ -4,8 +4,10 @@ mod email;
 mod logger;
 mod restore;
 mod scanner;
+mod state;
 mod utils;
 
+use chrono::{DateTime, Local};
 use clap::CommandFactory;
 use clap::{Parser, Subcommand};
 use clap_complete::{generate, Shell};
@@ -151,57 +153,44 @@ enum IntervalAction {
 #[tokio::main]
 async fn main() -> anyhow::Result<()> {
     let cli = Cli::parse();
-    let mut cfg = config::Config::load_or_create().await?;
     logger::init();
 
+    // The config is only read (or interactively created) by the commands
+    // that use it, not for completion scripts
     match cli.command {
         Commands::Scan => {
+            let cfg = config::Config::load_or_create().await?;
             scanner::scan_projects(&cfg)?;
         }
         Commands::Backup { s } => {
+            let cfg = config::Config::load_or_create().await?;
+            let started = Local::now();
             let result = backup::run_backup(&cfg, s);
+            // Jobs run in parallel, so durations are wall-clock spans rather
+            // than sums of the (overlapping) job durations
+            let total_duration = seconds_between(started, Local::now());
             match &result {
                 Ok(summaries) => {
                     let mut total_backups = 0;
-                    let mut total_duration = 0.0;
-                    let mut total_size = 0.0;
+                    let mut total_size = 0;
                     let mut summary_messages = String::new();
                     for summary in summaries {
-                        let mut app_duration = 0.0;
-                        let mut app_size = 0.0;
+                        let mut app_size = 0;
                         for vol in &summary.volume_statuses {
                             total_backups += 1;
-                            if let Some(dur_str) = vol.duration.strip_suffix(" seconds") {
-                                if let Ok(dur) = dur_str.parse::<f64>() {
-                                    total_duration += dur;
-                                    app_duration += dur;
-                                }
-                            }
-                            let raw_size = vol.size.trim();
-                            let (value_part, _unit) = raw_size
-                                .chars()
-                                .partition::<String, _>(|c| c.is_ascii_digit() || *c == '.');
-
-                            if let Ok(raw) = value_part.parse::<f64>() {
-                                let multiplier = if raw_size.contains("KB") {
-                                    1_000.0
-                                } else if raw_size.contains("MB") {
-                                    1_000_000.0
-                                } else if raw_size.contains("GB") {
-                                    1_000_000_000.0
-                                } else if raw_size.contains("B") {
-                                    1.0
-                                } else {
-                                    1.0
-                                };
-
-                                let actual_size = raw * multiplier;
-                                total_size += actual_size;
-                                app_size += actual_size;
-                            }
+                            total_size += vol.size_bytes;
+                            app_size += vol.size_bytes;
                         }
+                        let app_started =
+                            summary.volume_statuses.iter().map(|vol| vol.started).min();
+                        let app_finished =
+                            summary.volume_statuses.iter().map(|vol| vol.finished).max();
+                        let app_duration = match (app_started, app_finished) {
+                            (Some(started), Some(finished)) => seconds_between(started, finished),
+                            _ => 0.0,
+                        };
                         summary_messages.push_str(&format!(
-                            "<h2>{}</h2> <p>Duration: {:.2} seconds, Size: {:.2} bytes</p>",
+                            "<h2>{}</h2> <p>Duration: {:.2} seconds, Size: {} bytes</p>",
                             summary.name, app_duration, app_size
                         ));
                         summary_messages.push_str("<table border=\"1\" cellpadding=\"8\" cellspacing=\"0\" style=\"border-collapse: collapse; font-family: sans-serif; font-size: 14px;\"><tr style=\"background-color: #f2f2f2;\"><th>Name</th><th>Status</th><th>Type</th><th>Size</th><th>Duration</th></tr>");
@@ -214,7 +203,7 @@ async fn main() -> anyhow::Result<()> {
                         summary_messages.push_str("</table>");
                     }
                     let summary_line = format!(
-                        "<p>Total Backups: {} - Total Duration: {:.2} seconds - Total Size: {:.2} bytes</p>",
+                        "<p>Total Backups: {} - Total Duration: {:.2} seconds - Total Size: {} bytes</p>",
                         total_backups, total_duration, total_size
                     );
                     let final_message = format!("{}{}", summary_line, summary_messages);
@@ -227,115 +216,128 @@ async fn main() -> anyhow::Result<()> {
             }
             result?;
         }
-        Commands::DryRun => backup::dry_run(&cfg)?,
+        Commands::DryRun => {
+            let cfg = config::Config::load_or_create().await?;
+            backup::dry_run(&cfg)?
+        }
         Commands::Restore {
             project,
             version,
             repo,
             volumes,
         } => {
+            let cfg = config::Config::load_or_create().await?;
             restore::handle_restore_command(&cfg, project, version, repo, volumes);
         }
-        Commands::SetupCompletion { shell } => {
-            let _path = match shell {
-                Shell::Zsh => {
-                    let path = dirs::home_dir().unwrap().join(".zfunc").join("_dockup");
-                    fs::create_dir_all(path.parent().unwrap())?;
-                    let mut file = fs::File::create(&path)?;
-                    generate(shell, &mut Cli::command(), "dockup", &mut file);
-                    log::info!("Completion script installed to: {}", path.display());
-                    println!(
-                        "👉 Add this to your ~/.zshrc if not already there:\n\n  fpath+=~/.zfunc\n  autoload -Uz compinit && compinit\n"
-                    );
-                    println!(
-                        "Do you want to automatically add the setup to your shell config? (y/n):"
-                    );
-                    let mut answer = String::new();
-                    std::io::stdin().read_line(&mut answer)?;
-                    if answer.trim() == "y" {
-                        let zshrc = dirs::home_dir().unwrap().join(".zshrc");
-                        let snippet = "fpath+=~/.zfunc\nautoload -Uz compinit && compinit";
-                        let contents = fs::read_to_string(&zshrc).unwrap_or_default();
-                        if !contents.contains(snippet) {
-                            let mut file = fs::OpenOptions::new().append(true).open(&zshrc)?;
-                            writeln!(file, "\n{}", snippet)?;
-                            log::info!("✅ Added completion setup to {}", zshrc.display());
-                        }
-                    }
-                    path
+        Commands::SetupCompletion { shell } => setup_completion(shell)?,
+        Commands::Interval { action } => {
+            let mut cfg = config::Config::load_or_create().await?;
+            match action {
+                IntervalAction::View => {
+                    let interval = cfg.cron_human_summary();
+                    println!("{}", interval);
                 }
-                Shell::Bash => {
-                    let path = dirs::home_dir()
-                        .unwrap()
-                        .join(".dockup")
-                        .join("dockup.bash");
-                    fs::create_dir_all(path.parent().unwrap())?;
-                    let mut file = fs::File::create(&path)?;
-                    generate(shell, &mut Cli::command(), "dockup", &mut file);
-                    log::info!("✅ Bash completion written to: {}", path.display());
-                    println!(
-                        "👉 Add this to your ~/.bashrc:\n\n  source {}\n",
-                        path.display()
-                    );
-                    println!(
-                        "Do you want to automatically add the setup to your shell config? (y/n):"
-                    );
-                    let mut answer = String::new();
-                    std::io::stdin().read_line(&mut answer)?;
-                    if answer.trim() == "y" {
-                        let bashrc = dirs::home_dir().unwrap().join(".bashrc");
-                        let snippet = format!("source {}", path.display());
-                        let contents = fs::read_to_string(&bashrc).unwrap_or_default();
-                        if !contents.contains(&snippet) {
-                            let mut file = fs::OpenOptions::new().append(true).open(&bashrc)?;
-                            writeln!(file, "\n{}", snippet)?;
-                            log::info!("✅ Added completion setup to {}", bashrc.display());
-                        }
-                    }
-                    path
+                IntervalAction::Set { key, value } => {
+                    let mut cfg = cfg;
+                    cfg.set_key_value(&key, &value)?;
+                    cfg.save()?;
+                    log::info!("Updated backup interval key `{key}` to `{value}`");
                 }
-                _ => {
-                    log::error!("❌ Completion setup for {:?} not supported yet.", shell);
-                    return Ok(());
+                IntervalAction::Reset => {
+                    cfg.reset_interval_to_default()?;
                 }
-            };
-        }
-        Commands::Interval { action } => match action {
-            IntervalAction::View => {
-                let interval = cfg.cron_human_summary();
-                println!("{}", interval);
             }
-            IntervalAction::Set { key, value } => {
-                let mut cfg = cfg;
-                cfg.set_key_value(&key, &value)?;
-                cfg.save()?;
-                log::info!("Updated backup interval key `{key}` to `{value}`");
-            }
-            IntervalAction::Reset => {
-                cfg.reset_interval_to_default()?;
-            }
-        },
-        Commands::Config { action } => match action {
-            ConfigAction::View => println!("{:#?}", cfg),
-            ConfigAction::Set { key, value } => {
-                let mut cfg = cfg;
-                cfg.set_key_value(&key, &value)?;
-                cfg.save()?;
-                log::info!("Updated config key `{key}` to `{value}`");
-                println!("Do you want to test the new configuration? (y/n):");
-                let mut input = String::new();
-                std::io::stdin().read_line(&mut input)?;
-                if input.trim() == "y" {
+        }
+        Commands::Config { action } => {
+            let cfg = config::Config::load_or_create().await?;
+            match action {
+                ConfigAction::View => println!("{:#?}", cfg),
+                ConfigAction::Set { key, value } => {
+                    let mut cfg = cfg;
+                    cfg.set_key_value(&key, &value)?;
+                    cfg.save()?;
+                    log::info!("Updated config key `{key}` to `{value}`");
+                    println!("Do you want to test the new configuration? (y/n):");
+                    let mut input = String::new();
+                    std::io::stdin().read_line(&mut input)?;
+                    if input.trim() == "y" {
+                        cfg.test_ssh().await?;
+                        cfg.test_email().await?;
+                    }
+                }
+                ConfigAction::Test => {
                     cfg.test_ssh().await?;
                     cfg.test_email().await?;
                 }
             }
-            ConfigAction::Test => {
-                cfg.test_ssh().await?;
-                cfg.test_email().await?;
-            }
-        },
+        }
     }
 
     Ok(())
 }
+
+fn setup_completion(shell: Shell) -> anyhow::Result<()> {
+    let _path = match shell {
+        Shell::Zsh => {
+            let path = dirs::home_dir().unwrap().join(".zfunc").join("_dockup");
+            fs::create_dir_all(path.parent().unwrap())?;
+            let mut file = fs::File::create(&path)?;
+            generate(shell, &mut Cli::command(), "dockup", &mut file);
+            log::info!("Completion script installed to: {}", path.display());
+            println!(
+                "👉 Add this to your ~/.zshrc if not already there:\n\n  fpath+=~/.zfunc\n  autoload -Uz compinit && compinit\n"
+            );
+            println!("Do you want to automatically add the setup to your shell config? (y/n):");
+            let mut answer = String::new();
+            std::io::stdin().read_line(&mut answer)?;
+            if answer.trim() == "y" {
+                let zshrc = dirs::home_dir().unwrap().join(".zshrc");
+                let snippet = "fpath+=~/.zfunc\nautoload -Uz compinit && compinit";
+                let contents = fs::read_to_string(&zshrc).unwrap_or_default();
+                if !contents.contains(snippet) {
+                    let mut file = fs::OpenOptions::new().append(true).open(&zshrc)?;
+                    writeln!(file, "\n{}", snippet)?;
+                    log::info!("✅ Added completion setup to {}", zshrc.display());
+                }
+            }
+            path
+        }
+        Shell::Bash => {
+            let path = dirs::home_dir()
+                .unwrap()
+                .join(".dockup")
+                .join("dockup.bash");
+            fs::create_dir_all(path.parent().unwrap())?;
+            let mut file = fs::File::create(&path)?;
+            generate(shell, &mut Cli::command(), "dockup", &mut file);
+            log::info!("✅ Bash completion written to: {}", path.display());
+            println!(
+                "👉 Add this to your ~/.bashrc:\n\n  source {}\n",
+                path.display()
+            );
+            println!("Do you want to automatically add the setup to your shell config? (y/n):");
+            let mut answer = String::new();
+            std::io::stdin().read_line(&mut answer)?;
+            if answer.trim() == "y" {
+                let bashrc = dirs::home_dir().unwrap().join(".bashrc");
+                let snippet = format!("source {}", path.display());
+                let contents = fs::read_to_string(&bashrc).unwrap_or_default();
+                if !contents.contains(&snippet) {
+                    let mut file = fs::OpenOptions::new().append(true).open(&bashrc)?;
+                    writeln!(file, "\n{}", snippet)?;
+                    log::info!("✅ Added completion setup to {}", bashrc.display());
+                }
+            }
+            path
+        }
+        _ => {
+            log::error!("❌ Completion setup for {:?} not supported yet.", shell);
+            return Ok(());
+        }
+    };
+    Ok(())
+}
+
+fn seconds_between(started: DateTime<Local>, finished: DateTime<Local>) -> f64 {
+    (finished - started).num_milliseconds() as f64 / 1000.0
+}
@@ -15,7 +15,14 @@ use ratatui::{
 
 use crate::logger::disable_stdout_logging;
 use crate::logger::enable_stdout_logging;
-use crate::{config::Config, scanner::BackupApplication, utils::run_remote_cmd_with_output};
+use crate::{
+    config::Config,
+    scanner::{BackupApplication, Compression, VolumeType, RESTORE_STAGING_SUFFIX},
+    utils::{
+        rsync_ssh_arg, run_parallel, run_remote_cmd_with_output, ssh_destination,
+        ssh_stream_command,
+    },
+};
 
 pub fn handle_restore_command(
     config: &Config,
@@ -489,51 +496,34 @@ impl<'a> Widget for &'a RestoreApp<'a> {
 async fn scan_backup_target(config: &Config) -> anyhow::Result<Vec<BackupApplication>> {
     log::debug!("Scanning backup target: {}", config.remote_backup_path);
     let mut backups = Vec::new();
-    let listing =
-        run_remote_cmd_with_output(config, &format!("ls -1 {}", config.remote_backup_path))
-            .map_err(|e| io::Error::new(io::ErrorKind::Other, e))?;
-
-    let application_folders = listing
-        .lines()
-        .filter(|line| !line.contains("."))
-        .collect::<Vec<_>>();
-
-    for app in application_folders {
-        log::debug!("Found backup application: {}", app);
-        let listing = run_remote_cmd_with_output(
-            config,
-            &format!("ls -1 {}/{}", config.remote_backup_path, app),
-        )
-        .map_err(|e| io::Error::new(io::ErrorKind::Other, e))?;
-        let backup_folders = listing
-            .lines()
-            .filter(|line| !line.contains("."))
-            .collect::<Vec<_>>();
-        log::debug!("Found backup folders: {:?}", backup_folders);
-        for backup_folder in backup_folders {
-            let meta = run_remote_cmd_with_output(
-                config,
-                &format!(
-                    "cat {}/{}/{}/meta.json",
-                    config.remote_backup_path, app, backup_folder
-                ),
-            );
 
-            let meta = match meta {
-                Ok(meta) => {
-                    log::debug!("Found meta.json: {}", meta);
-                    let meta: BackupApplication = serde_json::from_str(&meta)
-                        .map_err(|e| io::Error::new(io::ErrorKind::Other, e))?;
-                    log::debug!("Parsed meta.json: {:?}", meta);
-                    meta
-                }
-                Err(e) => {
-                    log::error!("Failed to read meta.json: {}", e);
-                    continue;
-                }
-            };
-            backups.push(meta);
+    // One round trip for all meta.json files instead of an `ls` per application
+    // and a `cat` per backup. Every file is introduced by a NUL byte followed
+    // by its `<app>/<backup>/meta.json` path on a line of its own.
+    let listing = run_remote_cmd_with_output(
+        config,
+        &format!(
+            "cd {} && for f in */*/meta.json; do if [ -f \"$f\" ]; then printf '\\0%s\\n' \"$f\"; cat \"$f\"; fi; done",
+            config.remote_backup_path
+        ),
+    )
+    .map_err(|e| io::Error::new(io::ErrorKind::Other, e))?;
+
+    for entry in listing.split('\0').skip(1) {
+        let Some((path, meta)) = entry.split_once('\n') else {
+            continue;
+        };
+        let mut parts = path.split('/');
+        let app = parts.next().unwrap_or_default();
+        let backup_folder = parts.next().unwrap_or_default();
+        if app.contains('.') || backup_folder.contains('.') {
+            continue;
         }
+        log::debug!("Found meta.json in {}/{}: {}", app, backup_folder, meta);
+        let meta: BackupApplication =
+            serde_json::from_str(meta).map_err(|e| io::Error::new(io::ErrorKind::Other, e))?;
+        log::debug!("Parsed meta.json: {:?}", meta);
+        backups.push(meta);
     }
 
     Ok(backups)
@@ -608,10 +598,14 @@ fn style_checkboxes<'a>(
         .collect()
 }
 
-use std::{fs, process::Command};
+use std::{
+    fs,
+    path::{Path, PathBuf},
+    process::Command,
+};
 
 impl<'a> RestoreApp<'a> {
-    /// Kick off the actual scp/tar restore now that user has confirmed.
+    /// Kick off the actual ssh/tar restore now that user has confirmed.
     fn start_restore_process(&mut self) -> io::Result<()> {
         let project = &self.projects[self.selected_project_index];
         let backups = get_backups(&self.backups, project);
@@ -624,122 +618,307 @@ impl<'a> RestoreApp<'a> {
             self.config.remote_backup_path, backup.name, folder
         );
 
-        // Build list: volumes + "REPO" if toggled
-        let mut items: Vec<String> = self.selected_volumes.iter().cloned().collect();
-        if self.toggled_repo && !items.contains(&"REPO".into()) {
-            items.push("REPO".into());
-        }
-
-        for name in items {
+        // The repo archive replaces the whole project folder, which bind
+        // mounts often live in, so it is restored before any volume
+        if self.toggled_repo || self.selected_volumes.contains("REPO") {
             self.restore_message
                 .push(Line::from(format!("🚧 Restoring Repo")));
-            if name == "REPO" {
-                let remote = format!("{}/REPO/repo.tar.gz", remote_base);
-                let tmp = std::env::temp_dir().join("repo.tar.gz");
-
-                // Download
-                self.restore_message
-                    .push(Line::from(format!("⏬ Downloading repo")));
-                let output = Command::new("scp")
-                    .args(&[
-                        "-i",
-                        &self.config.ssh_key,
-                        "-P",
-                        &self.config.ssh_port.to_string(),
-                        &format!(
-                            "{}@{}:{}",
-                            self.config.ssh_user, self.config.ssh_host, remote
-                        ),
-                        tmp.to_str().unwrap(),
-                    ])
-                    .stdout(Stdio::null())
-                    .stderr(Stdio::piped())
-                    .output()?;
-                if !output.status.success() {
-                    let err = String::from_utf8_lossy(&output.stderr);
-                    self.restore_message
-                        .push(Line::from(format!("⚠️ failed scp repo: {}", err)));
-                    continue;
-                }
-
-                self.restore_message
-                    .push(Line::from(format!("📂 Extracting repo")));
-
-                // Extract
-                let dest = &backup.application_path;
-                fs::remove_dir_all(dest).ok();
-                fs::create_dir_all(dest)?;
-                let status = Command::new("tar")
-                    .args(&["-xzf", tmp.to_str().unwrap(), "-C", dest.to_str().unwrap()])
-                    .stdout(Stdio::null())
-                    .stderr(Stdio::piped())
-                    .status()?;
-                if status.success() {
-                    self.restore_message.push(Line::from("✅ repo restored"));
-                } else {
-                    self.restore_message
-                        .push(Line::from("⚠️ repo extract failed"));
-                }
-            } else {
-                self.restore_message
-                    .push(Line::from(format!("🚧 Restoring volume: {}", name)));
-                // Find Volume entry
-                if let Some(v) = backup.volumes.iter().find(|v| &v.name == &name) {
-                    // remote tarball path uses underscores for slashes
-                    let tarname = format!("{}.tar.gz", v.path.to_string_lossy().replace('/', "_"));
-                    let remote = format!("{}/VOLUMES/{}", remote_base, tarname);
-                    let tmp = std::env::temp_dir().join(&tarname);
-
-                    self.restore_message
-                        .push(Line::from(format!("⏬ Downloading {}", name)));
-
-                    let output = Command::new("scp")
-                        .args(&[
-                            "-i",
-                            &self.config.ssh_key,
-                            "-P",
-                            &self.config.ssh_port.to_string(),
-                            &format!(
-                                "{}@{}:{}",
-                                self.config.ssh_user, self.config.ssh_host, remote
-                            ),
-                            tmp.to_str().unwrap(),
-                        ])
-                        .stdout(Stdio::null())
-                        .stderr(Stdio::piped())
-                        .output()?;
-                    if !output.status.success() {
-                        let err = String::from_utf8_lossy(&output.stderr);
-                        self.restore_message
-                            .push(Line::from(format!("⚠️ failed scp {}: {}", name, err)));
-                        continue;
-                    }
+            let remote = format!(
+                "{}/REPO/repo.{}",
+                remote_base,
+                backup.compression.extension()
+            );
 
-                    self.restore_message
-                        .push(Line::from(format!("📂 Extracting {}", name)));
-
-                    // destroy and recreate target
-                    let dest = &v.path;
-                    fs::remove_dir_all(dest).ok();
-                    fs::create_dir_all(dest)?;
-                    // extract
-                    let status = Command::new("tar")
-                        .args(&["-xzf", tmp.to_str().unwrap(), "-C", dest.to_str().unwrap()])
-                        .stdout(Stdio::null())
-                        .stderr(Stdio::piped())
-                        .status()?;
-                    if status.success() {
-                        self.restore_message
-                            .push(Line::from(format!("✅ {}", name)));
-                    } else {
-                        self.restore_message
-                            .push(Line::from(format!("⚠️ extract {}", name)));
-                    }
-                }
+            self.restore_message
+                .push(Line::from(format!("⏬ Downloading and extracting repo")));
+            match stream_extract(
+                &self.config,
+                &remote,
+                backup.compression,
+                &backup.application_path,
+            ) {
+                Ok(()) => self.restore_message.push(Line::from("✅ repo restored")),
+                Err(e) => self
+                    .restore_message
+                    .push(Line::from(format!("⚠️ repo restore failed: {}", e))),
             }
         }
 
+        // Volumes download in parallel, each over its own ssh stream. Volumes
+        // nested in one another replace each other's folders, so those are
+        // restored one after the other, parent first.
+        let names: Vec<&String> = self
+            .selected_volumes
+            .iter()
+            .filter(|name| *name != "REPO")
+            .collect();
+        let groups = nested_groups(backup, names);
+        let config = &self.config;
+        let results = run_parallel(&groups, config.backup_workers, |group| {
+            group
+                .iter()
+                .flat_map(|name| restore_volume(config, backup, &remote_base, name))
+                .collect::<Vec<_>>()
+        });
+        for lines in results {
+            self.restore_message.extend(lines);
+        }
+
         // keep popup visible so user sees the messages
         Ok(())
     }
 }
+
+/// Splits the volumes `names` of `backup` into groups that can be restored in
+/// parallel: volumes whose paths are nested in one another share a group,
+/// ordered parent before child.
+fn nested_groups<'b>(
+    backup: &BackupApplication,
+    mut names: Vec<&'b String>,
+) -> Vec<Vec<&'b String>> {
+    let path_of = |name: &String| {
+        backup
+            .volumes
+            .iter()
+            .find(|v| &v.name == name)
+            .map(|v| v.path.clone())
+    };
+    // Sorting by path puts every parent before the folders below it
+    names.sort_by_key(|name| path_of(*name));
+
+    let mut groups: Vec<(Vec<PathBuf>, Vec<&String>)> = Vec::new();
+    for name in names {
+        let Some(path) = path_of(name) else {
+            groups.push((Vec::new(), vec![name]));
+            continue;
+        };
+        let nested = groups.iter_mut().find(|(paths, _)| {
+            paths
+                .iter()
+                .any(|other| path.starts_with(other) || other.starts_with(&path))
+        });
+        match nested {
+            Some((paths, members)) => {
+                paths.push(path);
+                members.push(name);
+            }
+            None => groups.push((vec![path], vec![name])),
+        }
+    }
+    groups.into_iter().map(|(_, members)| members).collect()
+}
+
+/// Restores one volume of `backup` and returns the lines for the popup.
+fn restore_volume(
+    config: &Config,
+    backup: &BackupApplication,
+    remote_base: &str,
+    name: &str,
+) -> Vec<Line<'static>> {
+    let mut lines = vec![Line::from(format!("🚧 Restoring volume: {}", name))];
+    // Find Volume entry
+    let Some(v) = backup.volumes.iter().find(|v| v.name == name) else {
+        return lines;
+    };
+    let result = if backup.rsync_bind_mounts && matches!(v.volume_type, VolumeType::Bind) {
+        let remote = format!("{}/VOLUMES/{}", remote_base, v.snapshot_dir_name());
+        lines.push(Line::from(format!("⏬ Syncing {}", name)));
+        rsync_restore(config, &remote, &v.path)
+    } else {
+        let remote = format!(
+            "{}/VOLUMES/{}",
+            remote_base,
+            v.archive_name(backup.compression)
+        );
+        lines.push(Line::from(format!(
+            "⏬ Downloading and extracting {}",
+            name
+        )));
+        stream_extract(config, &remote, backup.compression, &v.path)
+    };
+    match result {
+        Ok(()) => lines.push(Line::from(format!("✅ {}", name))),
+        Err(e) => lines.push(Line::from(format!("⚠️ restore {}: {}", name, e))),
+    }
+    lines
+}
+
+/// Pipes `remote` from the backup target straight into `tar -x`, without
+/// staging the archive in a temp file. Extraction goes to a sibling directory
+/// that only replaces `dest` once the whole archive arrived intact.
+fn stream_extract(
+    config: &Config,
+    remote: &str,
+    compression: Compression,
+    dest: &Path,
+) -> Result<(), String> {
+    let mut staging = dest.as_os_str().to_owned();
+    staging.push(RESTORE_STAGING_SUFFIX);
+    let staging = PathBuf::from(staging);
+    fs::remove_dir_all(&staging).ok();
+    fs::create_dir_all(&staging).map_err(|e| e.to_string())?;
+
+    let mut download = ssh_stream_command(config, &format!("cat '{}'", remote))
+        .stdout(Stdio::piped())
+        .stderr(Stdio::piped())
+        .spawn()
+        .map_err(|e| e.to_string())?;
+
+    let extract = Command::new("tar")
+        .args([
+            "-x",
+            compression.tar_flag(),
+            "-f",
+            "-",
+            "-C",
+            staging.to_str().unwrap(),
+        ])
+        .stdin(download.stdout.take().unwrap())
+        .stdout(Stdio::null())
+        .stderr(Stdio::piped())
+        .output();
+    let download = download.wait_with_output().map_err(|e| e.to_string())?;
+
+    // A failing tar makes ssh die of SIGPIPE, so tar's error is the real cause
+    let result = match extract {
+        Err(e) => Err(e.to_string()),
+        Ok(extract) if !extract.status.success() => Err(format!(
+            "extract failed: {}",
+            String::from_utf8_lossy(&extract.stderr).trim()
+        )),
+        Ok(_) if !download.status.success() => Err(format!(
+            "download failed: {}",
+            String::from_utf8_lossy(&download.stderr).trim()
+        )),
+        Ok(_) => Ok(()),
+    };
+    if result.is_err() {
+        fs::remove_dir_all(&staging).ok();
+        return result;
+    }
+
+    // Swap the folders. Files containers created as root, or `dest` being a
+    // mount point, can keep it from being removed; then the archive is
+    // copied over what is left, as extracting in place would have done.
+    let removed = match fs::remove_dir_all(dest) {
+        Err(e) if e.kind() != io::ErrorKind::NotFound => Err(e),
+        _ => Ok(()),
+    };
+    let result = match removed.and_then(|()| fs::rename(&staging, dest)) {
+        Ok(()) => Ok(()),
+        Err(e) => copy_over(&staging, dest).map_err(|cp| format!("{} ({})", cp, e)),
+    };
+    fs::remove_dir_all(&staging).ok();
+    result
+}
+
+/// Copies the contents of `src` over `dest`, keeping owners and modes.
+fn copy_over(src: &Path, dest: &Path) -> Result<(), String> {
+    fs::create_dir_all(dest).map_err(|e| e.to_string())?;
+    let output = Command::new("cp")
+        .arg("-a")
+        .arg(src.join("."))
+        .arg(dest)
+        .stdout(Stdio::null())
+        .stderr(Stdio::piped())
+        .output()
+        .map_err(|e| e.to_string())?;
+    if !output.status.success() {
+        return Err(format!(
+            "copy failed: {}",
+            String::from_utf8_lossy(&output.stderr).trim()
+        ));
+    }
+    Ok(())
+}
+
+/// Syncs an rsync snapshot folder back into `dest`, transferring only the
+/// files that differ from what is already there.
+fn rsync_restore(config: &Config, remote_dir: &str, dest: &Path) -> Result<(), String> {
+    fs::create_dir_all(dest).map_err(|e| e.to_string())?;
+    let output = Command::new("rsync")
+        .args([
+            "-aH",
+            "--numeric-ids",
+            "--delete",
+            "-e",
+            &rsync_ssh_arg(config),
+        ])
+        .arg(format!("{}:{}/", ssh_destination(config), remote_dir))
+        .arg(format!("{}/", dest.display()))
+        .stdout(Stdio::null())
+        .stderr(Stdio::piped())
+        .output()
+        .map_err(|e| e.to_string())?;
+    if !output.status.success() {
+        return Err(format!(
+            "rsync failed: {}",
+            String::from_utf8_lossy(&output.stderr).trim()
+        ));
+    }
+    Ok(())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::scanner::Volume;
+
+    fn app(volumes: &[(&str, &str)]) -> BackupApplication {
+        BackupApplication {
+            name: "app".into(),
+            timestamp: chrono::Local::now(),
+            backup_type: None,
+            compression: Compression::default(),
+            rsync_bind_mounts: false,
+            application_path: PathBuf::from("/p"),
+            volumes: volumes
+                .iter()
+                .map(|(name, path)| Volume {
+                    name: name.to_string(),
+                    path: PathBuf::from(path),
+                    volume_type: VolumeType::Bind,
+                })
+                .collect(),
+        }
+    }
+
+    fn groups(backup: &BackupApplication, names: &[&str]) -> Vec<Vec<String>> {
+        let names: Vec<String> = names.iter().map(|name| name.to_string()).collect();
+        nested_groups(backup, names.iter().collect())
+            .into_iter()
+            .map(|group| group.into_iter().cloned().collect())
+            .collect()
+    }
+
+    #[test]
+    fn nested_volumes_share_a_group_parent_first() {
+        let backup = app(&[("sub", "/p/data/sub"), ("data", "/p/data")]);
+
+        assert_eq!(groups(&backup, &["sub", "data"]), vec![vec!["data", "sub"]]);
+    }
+
+    #[test]
+    fn separate_volumes_get_separate_groups() {
+        let backup = app(&[
+            ("data", "/p/data"),
+            ("data-old", "/p/data-old"),
+            ("logs", "/p/logs"),
+        ]);
+
+        assert_eq!(
+            groups(&backup, &["logs", "data-old", "data"]),
+            vec![vec!["data"], vec!["data-old"], vec!["logs"]]
+        );
+    }
+
+    #[test]
+    fn unknown_volumes_get_a_group_of_their_own() {
+        let backup = app(&[("data", "/p/data"), ("sub", "/p/data/sub")]);
+
+        assert_eq!(
+            groups(&backup, &["sub", "ghost", "data"]),
+            vec![vec!["ghost"], vec!["data", "sub"]]
+        );
+    }
+}
@@ -18,6 +18,48 @@ pub enum VolumeType {
     Mount,
 }
 
+impl Volume {
+    /// Name of this volume's rsync snapshot folder in the `VOLUMES` folder of
+    /// a backup, the path with underscores for slashes.
+    pub fn snapshot_dir_name(&self) -> String {
+        self.path
+            .to_string_lossy()
+            .trim_start_matches("./")
+            .replace('/', "_")
+    }
+
+    /// File name of this volume's archive in the `VOLUMES` folder of a backup.
+    pub fn archive_name(&self, compression: Compression) -> String {
+        format!("{}.{}", self.snapshot_dir_name(), compression.extension())
+    }
+}
+
+/// Compression of the archives of a backup. Backups made before this was
+/// recorded in `meta.json` are gzip.
+#[derive(Serialize, Deserialize, Debug, Clone, Copy, Default, PartialEq)]
+pub enum Compression {
+    #[default]
+    Gzip,
+    Zstd,
+}
+
+impl Compression {
+    pub fn extension(&self) -> &'static str {
+        match self {
+            Compression::Gzip => "tar.gz",
+            Compression::Zstd => "tar.zst",
+        }
+    }
+
+    /// The `tar` flag that decompresses this format.
+    pub fn tar_flag(&self) -> &'static str {
+        match self {
+            Compression::Gzip => "-z",
+            Compression::Zstd => "--zstd",
+        }
+    }
+}
+
 #[derive(Serialize, Deserialize, Debug, Clone, Copy)]
 pub enum BackupType {
     Manual,
@@ -38,6 +80,11 @@ pub struct BackupApplication {
     pub name: String,
     pub timestamp: chrono::DateTime<chrono::Local>,
     pub backup_type: Option<BackupType>,
+    #[serde(default)]
+    pub compression: Compression,
+    /// Bind mounts were stored as rsync snapshot folders, not archives.
+    #[serde(default)]
+    pub rsync_bind_mounts: bool,
     pub application_path: PathBuf,
     pub volumes: Vec<Volume>,
 }
@@ -56,22 +103,40 @@ pub fn scan_projects(config: &Config) -> Result<Vec<BackupApplication>> {
     Ok(apps)
 }
 
+/// Suffix of the folder a restore extracts into before swapping it in place.
+pub const RESTORE_STAGING_SUFFIX: &str = ".dockup-restore";
+
 /// Discover valid backup projects
 fn discover_projects(base: &str) -> Result<Vec<BackupApplication>> {
     let mut projects = Vec::new();
+    // One timestamp per run, so all apps land in the same snapshot folder name
+    let timestamp = chrono::Local::now();
 
     for entry in fs::read_dir(base)? {
         let entry = entry?;
         let path = entry.path();
-        if path.is_dir() {
+        // The type comes with the directory entry (d_type), so only symlinks
+        // need an extra stat to see whether they point at a directory
+        let file_type = entry.file_type()?;
+        // A repo restore stages its extraction next to the project folder
+        if entry
+            .file_name()
+            .to_string_lossy()
+            .ends_with(RESTORE_STAGING_SUFFIX)
+        {
+            continue;
+        }
+        if file_type.is_dir() || (file_type.is_symlink() && path.is_dir()) {
             let compose = path.join("docker-compose.yml");
             if compose.exists() {
                 let volumes = parse_volumes(&compose, &path)?;
                 let name = path.file_name().unwrap().to_string_lossy().to_string();
                 projects.push(BackupApplication {
                     name,
-                    timestamp: chrono::Local::now(),
+                    timestamp,
                     backup_type: None,
+                    compression: Compression::default(),
+                    rsync_bind_mounts: false,
                     application_path: path.clone(),
                     volumes: volumes,
                 });
@@ -0,0 +1,156 @@
+use anyhow::Result;
+use serde::{Deserialize, Serialize};
+use std::{
+    collections::{hash_map::DefaultHasher, HashMap},
+    fs,
+    hash::{Hash, Hasher},
+    io,
+    path::{Path, PathBuf},
+    time::UNIX_EPOCH,
+};
+use walkdir::WalkDir;
+
+/// What was uploaded for a local path in a previous run.
+#[derive(Debug, Serialize, Deserialize, Clone)]
+pub struct StateEntry {
+    pub fingerprint: u64,
+    pub remote_path: String,
+    pub size: u64,
+    /// `remote_path` is an rsync snapshot folder rather than an archive.
+    #[serde(default)]
+    pub snapshot_dir: bool,
+}
+
+/// Fingerprints of previously uploaded repos and bind mounts, keyed by local
+/// path. Stored in `~/.dockup/state.json`.
+#[derive(Debug, Serialize, Deserialize, Default)]
+#[serde(default)]
+pub struct BackupState {
+    pub entries: HashMap<String, StateEntry>,
+}
+
+impl BackupState {
+    pub fn state_path() -> PathBuf {
+        dirs::home_dir()
+            .expect("Could not determine home directory")
+            .join(".dockup")
+            .join("state.json")
+    }
+
+    /// Loads the state of the last run. A missing or unreadable file just
+    /// means every path is uploaded again.
+    pub fn load() -> Self {
+        let data = match fs::read_to_string(Self::state_path()) {
+            Ok(data) => data,
+            Err(_) => return Self::default(),
+        };
+        serde_json::from_str(&data).unwrap_or_else(|e| {
+            log::warn!("⚠️  Ignoring unreadable backup state: {e}");
+            Self::default()
+        })
+    }
+
+    /// Writes the state to a temp file first, so an interrupted run never
+    /// leaves a truncated state behind.
+    pub fn save(&self) -> Result<()> {
+        let path = Self::state_path();
+        fs::create_dir_all(path.parent().unwrap())?;
+        let tmp = path.with_extension("json.tmp");
+        fs::write(&tmp, serde_json::to_string_pretty(self)?)?;
+        fs::rename(tmp, path)?;
+        Ok(())
+    }
+
+    /// The previous archive of `key`, if its contents have not changed since
+    /// and it was written with the archive `extension` of this run.
+    pub fn unchanged(&self, key: &str, fingerprint: u64, extension: &str) -> Option<&StateEntry> {
+        self.entries.get(key).filter(|entry| {
+            !entry.snapshot_dir
+                && entry.fingerprint == fingerprint
+                && entry.remote_path.ends_with(extension)
+        })
+    }
+}
+
+/// Hashes the relative path, type, size and mtime of everything below `path`.
+/// The hasher is not guaranteed to be stable across Rust releases; a changed
+/// algorithm only costs one extra upload per path.
+pub fn fingerprint(path: &Path) -> io::Result<u64> {
+    let mut hasher = DefaultHasher::new();
+    for entry in WalkDir::new(path).sort_by_file_name() {
+        let entry = entry?;
+        let meta = entry.metadata()?;
+        let mtime = meta
+            .modified()?
+            .duration_since(UNIX_EPOCH)
+            .unwrap_or_default()
+            .as_nanos();
+        entry.path().strip_prefix(path).unwrap().hash(&mut hasher);
+        meta.file_type().is_dir().hash(&mut hasher);
+        meta.file_type().is_symlink().hash(&mut hasher);
+        meta.len().hash(&mut hasher);
+        mtime.hash(&mut hasher);
+    }
+    Ok(hasher.finish())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn entry(fingerprint: u64, remote_path: &str, snapshot_dir: bool) -> StateEntry {
+        StateEntry {
+            fingerprint,
+            remote_path: remote_path.to_string(),
+            size: 1,
+            snapshot_dir,
+        }
+    }
+
+    /// A fresh, empty directory below the system temp dir.
+    fn temp_dir(name: &str) -> PathBuf {
+        let dir = std::env::temp_dir().join(format!("dockup-{}-{}", name, std::process::id()));
+        fs::remove_dir_all(&dir).ok();
+        fs::create_dir_all(&dir).unwrap();
+        dir
+    }
+
+    #[test]
+    fn unchanged_matches_fingerprint_and_extension() {
+        let mut state = BackupState::default();
+        state
+            .entries
+            .insert("/app".into(), entry(7, "/b/app/1/REPO/repo.tar.zst", false));
+
+        assert!(state.unchanged("/app", 7, "tar.zst").is_some());
+        assert!(state.unchanged("/app", 8, "tar.zst").is_none());
+        assert!(state.unchanged("/app", 7, "tar.gz").is_none());
+        assert!(state.unchanged("/other", 7, "tar.zst").is_none());
+    }
+
+    #[test]
+    fn unchanged_ignores_snapshot_dirs() {
+        let mut state = BackupState::default();
+        state
+            .entries
+            .insert("/data".into(), entry(0, "/b/app/1/VOLUMES/data", true));
+
+        assert!(state.unchanged("/data", 0, "").is_none());
+    }
+
+    #[test]
+    fn fingerprint_is_stable_and_sees_changes() {
+        let dir = temp_dir("fingerprint");
+        fs::create_dir_all(dir.join("sub")).unwrap();
+        fs::write(dir.join("a"), "one").unwrap();
+        fs::write(dir.join("sub").join("b"), "two").unwrap();
+
+        let first = fingerprint(&dir).unwrap();
+        assert_eq!(first, fingerprint(&dir).unwrap());
+
+        fs::write(dir.join("sub").join("b"), "changed").unwrap();
+        assert_ne!(first, fingerprint(&dir).unwrap());
+
+        fs::remove_dir_all(&dir).ok();
+    }
+}
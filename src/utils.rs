@@ -1,19 +1,102 @@
 use anyhow::{Context, Result};
-use std::process::Command;
+use std::{
+    env,
+    process::{Command, Stdio},
+    sync::{
+        atomic::{AtomicUsize, Ordering},
+        Condvar, Mutex,
+    },
+    thread,
+};
 
 use crate::config::Config;
 
+/// Options shared by every `ssh` call against the backup target.
+fn ssh_options(cfg: &Config) -> Vec<String> {
+    let control_path = dirs::home_dir()
+        .unwrap_or_default()
+        .join(".dockup")
+        .join("ssh-%C");
+    vec![
+        "-i".to_string(),
+        cfg.ssh_key.clone(),
+        // Since OpenSSH 7.8 non-interactive sessions are marked CS1, which many
+        // networks treat as scavenger traffic; backups are bulk, not background
+        "-o".to_string(),
+        "IPQoS=throughput".to_string(),
+        // Reuse one authenticated connection for all the small remote commands
+        // and uploads of a run instead of a TCP + key exchange + auth each time
+        "-o".to_string(),
+        "ControlMaster=auto".to_string(),
+        "-o".to_string(),
+        format!("ControlPath={}", control_path.display()),
+        "-o".to_string(),
+        "ControlPersist=60".to_string(),
+    ]
+}
+
+/// Builds an `ssh` invocation running `cmd` on the backup target. The remote
+/// command is passed as a single argument, no local shell is involved.
+/// Its traffic (listings, JSON metadata) is text, so it is compressed.
+pub fn ssh_command(cfg: &Config, cmd: &str) -> Command {
+    let mut ssh = base_ssh_command(cfg, &["-o", "Compression=yes"]);
+    ssh.arg(cmd);
+    ssh
+}
+
+/// Like `ssh_command`, but on a connection of its own. Meant for bulk
+/// transfers: all channels of a shared master are encrypted by one process,
+/// which would cap parallel streams at the speed of a single core.
+/// Archives are already compressed, so SSH compression is forced off even
+/// if the user's ssh config enables it.
+pub fn ssh_stream_command(cfg: &Config, cmd: &str) -> Command {
+    let mut ssh = base_ssh_command(cfg, &["-S", "none", "-o", "Compression=no"]);
+    ssh.arg(cmd);
+    ssh
+}
+
+/// The `-e` argument for rsync: ssh with the shared options on a dedicated,
+/// uncompressed connection, like `ssh_stream_command`.
+pub fn rsync_ssh_arg(cfg: &Config) -> String {
+    let port = cfg.ssh_port.to_string();
+    let mut args = vec!["ssh".to_string()];
+    args.extend(ssh_options(cfg));
+    args.extend(["-S", "none", "-o", "Compression=no", "-p", port.as_str()].map(String::from));
+    args.iter()
+        .map(|arg| format!("'{}'", arg))
+        .collect::<Vec<_>>()
+        .join(" ")
+}
+
+/// `user@host` of the backup target.
+pub fn ssh_destination(cfg: &Config) -> String {
+    format!("{}@{}", cfg.ssh_user, cfg.ssh_host)
+}
+
+/// Asks the shared master connection (if any) to stop accepting new
+/// sessions. Unlike `-O exit` this lets sessions of other dockup processes
+/// sharing the same control socket finish; the master exits after the last.
+pub fn close_ssh_master(cfg: &Config) {
+    let _ = base_ssh_command(cfg, &["-O", "stop"])
+        .stdout(Stdio::null())
+        .stderr(Stdio::null())
+        .status();
+}
+
+fn base_ssh_command(cfg: &Config, extra: &[&str]) -> Command {
+    let mut ssh = Command::new("ssh");
+    ssh.args(ssh_options(cfg))
+        .args(extra)
+        .arg("-p")
+        .arg(cfg.ssh_port.to_string())
+        .arg(ssh_destination(cfg));
+    ssh
+}
+
 pub fn run_remote_cmd_with_output(cfg: &Config, cmd: &str) -> Result<String> {
-    let full_cmd = format!(
-        "ssh -i {} -p {} {}@{} '{}'",
-        cfg.ssh_key, cfg.ssh_port, cfg.ssh_user, cfg.ssh_host, cmd
-    );
-
-    let output = Command::new("sh")
-        .arg("-c")
-        .arg(&full_cmd)
+    let output = ssh_command(cfg, cmd)
         .output()
-        .with_context(|| format!("Failed to run: {}", full_cmd))?;
+        .with_context(|| format!("Failed to run ssh command: {}", cmd))?;
 
     if !output.status.success() {
         anyhow::bail!(
@@ -25,3 +108,93 @@ pub fn run_remote_cmd_with_output(cfg: &Config, cmd: &str) -> Result<String> {
 
     Ok(String::from_utf8_lossy(&output.stdout).to_string())
 }
+
+/// Whether `program` can be found on `PATH`.
+pub fn has_program(program: &str) -> bool {
+    env::var_os("PATH")
+        .map(|paths| env::split_paths(&paths).any(|dir| dir.join(program).is_file()))
+        .unwrap_or(false)
+}
+
+/// Formats a byte count using decimal units.
+pub fn format_size(bytes: u64) -> String {
+    const UNITS: [&str; 4] = ["B", "KB", "MB", "GB"];
+    let mut size = bytes as f64;
+    let mut unit = 0;
+    while size >= 1000.0 && unit < UNITS.len() - 1 {
+        size /= 1000.0;
+        unit += 1;
+    }
+    if unit == 0 {
+        format!("{} B", bytes)
+    } else {
+        format!("{:.2} {}", size, UNITS[unit])
+    }
+}
+
+/// Runs `job` for every item on up to `workers` threads and returns the
+/// results in the order of `items`.
+pub fn run_parallel<T, R, F>(items: &[T], workers: usize, job: F) -> Vec<R>
+where
+    T: Sync,
+    R: Send,
+    F: Fn(&T) -> R + Sync,
+{
+    let next = AtomicUsize::new(0);
+    let results: Mutex<Vec<Option<R>>> = Mutex::new(items.iter().map(|_| None).collect());
+
+    thread::scope(|scope| {
+        for _ in 0..workers.clamp(1, items.len().max(1)) {
+            scope.spawn(|| loop {
+                let index = next.fetch_add(1, Ordering::Relaxed);
+                let Some(item) = items.get(index) else {
+                    break;
+                };
+                let result = job(item);
+                results.lock().unwrap()[index] = Some(result);
+            });
+        }
+    });
+
+    results
+        .into_inner()
+        .unwrap()
+        .into_iter()
+        .map(|result| result.expect("every job ran to completion"))
+        .collect()
+}
+
+/// Counting semaphore bounding how many threads run a section at once.
+pub struct Semaphore {
+    available: Mutex<usize>,
+    released: Condvar,
+}
+
+/// Returns its slot to the semaphore when dropped.
+pub struct SemaphoreGuard<'a>(&'a Semaphore);
+
+impl Semaphore {
+    pub fn new(permits: usize) -> Self {
+        Semaphore {
+            available: Mutex::new(permits.max(1)),
+            released: Condvar::new(),
+        }
+    }
+
+    /// Blocks until a slot is free and takes it.
+    pub fn acquire(&self) -> SemaphoreGuard<'_> {
+        let mut available = self.available.lock().unwrap();
+        while *available == 0 {
+            available = self.released.wait(available).unwrap();
+        }
+        *available -= 1;
+        SemaphoreGuard(self)
+    }
+}
+
+impl Drop for SemaphoreGuard<'_> {
+    fn drop(&mut self) {
+        *self.0.available.lock().unwrap() += 1;
+        self.0.released.notify_one();
+    }
+}